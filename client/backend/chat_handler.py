@@ -4,9 +4,10 @@ Chat handler for MCP Client Backend
 Integrates Azure OpenAI with MCP tools for dynamic tool calling.
 """
 
+import asyncio
 import json
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Awaitable, Callable, Dict, List, Any, Optional, Tuple
 from openai import AsyncAzureOpenAI
 from pydantic import BaseModel
 
@@ -30,7 +31,15 @@ class ChatHandler:
             api_version=api_version
         )
         self.deployment_name = deployment_name
-        logger.info(f"🤖 Azure OpenAI chat handler initialized with deployment: {deployment_name}")
+        
+        # Tool list the prepared context below was built from
+        self._tool_context_source: Optional[List[Dict[str, Any]]] = None
+        self._tool_context: Tuple[List[Dict[str, Any]], str, Dict[str, Tuple[str, str]]] = ([], "", {})
+        logger.info("🤖 Azure OpenAI chat handler initialized with deployment: %s", deployment_name)
+    
+    async def close(self):
+        """Close the underlying Azure OpenAI HTTP client."""
+        await self.client.close()
     
     def convert_mcp_tools_to_openai_format(self, mcp_tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Convert MCP tool definitions to OpenAI function calling format."""
@@ -47,9 +56,13 @@ class ChatHandler:
             }
             openai_tools.append(openai_tool)
         
-        logger.info(f"🔧 Converted {len(mcp_tools)} MCP tools to OpenAI format")
+        logger.info("🔧 Converted %d MCP tools to OpenAI format", len(mcp_tools))
         return openai_tools
     
+    def build_tool_routes(self, mcp_tools: List[Dict[str, Any]]) -> Dict[str, Tuple[str, str]]:
+        """Map prefixed function names back to their (server, tool) pair."""
+        return {f"{tool['server']}__{tool['name']}": (tool['server'], tool['name']) for tool in mcp_tools}
+    
     def create_system_prompt(self, available_tools: List[Dict[str, Any]]) -> str:
         """Create system prompt that describes available MCP tools."""
         if not available_tools:
@@ -85,17 +98,80 @@ Remember: The tool names in function calls should be prefixed with the server na
         
         return tools_description
     
+    def prepare_tool_context(
+        self, available_tools: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], str, Dict[str, Tuple[str, str]]]:
+        """Return OpenAI tools, system prompt and routes, rebuilt only when the tool list changes."""
+        if available_tools is not self._tool_context_source:
+            self._tool_context = (
+                self.convert_mcp_tools_to_openai_format(available_tools),
+                self.create_system_prompt(available_tools),
+                self.build_tool_routes(available_tools)
+            )
+            self._tool_context_source = available_tools
+        return self._tool_context
+    
+    @staticmethod
+    def _tool_message(tool_call_id: str, content: str) -> Dict[str, Any]:
+        """Build a tool result message for the conversation."""
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call_id,
+            "content": content
+        }
+    
+    async def _execute_server_tool_calls(
+        self,
+        server_name: str,
+        get_client: Callable[[str], Awaitable[Any]],
+        calls: List[Tuple[Any, str, Dict[str, Any]]]
+    ) -> Dict[str, Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """Execute all tool calls for one server over its persistent MCP session."""
+        results = {}
+        try:
+            client = await get_client(server_name)
+            for tool_call, tool_name, arguments in calls:
+                try:
+                    result = await client.call_tool(tool_name, arguments)
+                    
+                    # Render the result once for both the conversation and the response
+                    result_text = str(result)
+                    results[tool_call.id] = (
+                        self._tool_message(tool_call.id, result_text),
+                        {
+                            "server": server_name,
+                            "tool": tool_name,
+                            "arguments": arguments,
+                            "result": result_text
+                        }
+                    )
+                    logger.info("✅ Tool executed: %s.%s", server_name, tool_name)
+                except Exception as e:
+                    logger.error("❌ Tool execution failed: %s", e)
+                    results[tool_call.id] = (
+                        self._tool_message(tool_call.id, f"Error executing tool: {str(e)}"),
+                        None
+                    )
+        except Exception as e:
+            logger.error("❌ Tool execution failed: %s", e)
+            for tool_call, _, _ in calls:
+                results.setdefault(tool_call.id, (
+                    self._tool_message(tool_call.id, f"Error executing tool: {str(e)}"),
+                    None
+                ))
+        return results
+    
     async def chat_with_tools(
         self, 
         message: str, 
         available_tools: List[Dict[str, Any]], 
-        mcp_clients: Dict[str, Any]
+        mcp_clients: Dict[str, Any],
+        get_client: Callable[[str], Awaitable[Any]]
     ) -> ChatResponse:
         """Handle chat message with dynamic MCP tool calling."""
         try:
-            # Prepare OpenAI tools format
-            openai_tools = self.convert_mcp_tools_to_openai_format(available_tools)
-            system_prompt = self.create_system_prompt(available_tools)
+            # Prepare OpenAI tools format (reused while the tool catalog is unchanged)
+            openai_tools, system_prompt, tool_routes = self.prepare_tool_context(available_tools)
             
             # Prepare messages
             messages = [
@@ -103,7 +179,7 @@ Remember: The tool names in function calls should be prefixed with the server na
                 {"role": "user", "content": message}
             ]
             
-            logger.info(f"💭 Processing chat message: {message[:50]}...")
+            logger.info("💭 Processing chat message: %.50s...", message)
             
             # First LLM call - get tool calls
             response = await self.client.chat.completions.create(
@@ -119,7 +195,7 @@ Remember: The tool names in function calls should be prefixed with the server na
             
             # Execute tool calls if any
             if assistant_message.tool_calls:
-                logger.info(f"🔧 Executing {len(assistant_message.tool_calls)} tool calls")
+                logger.info("🔧 Executing %d tool calls", len(assistant_message.tool_calls))
                 
                 # Add assistant message to conversation
                 messages.append({
@@ -138,56 +214,56 @@ Remember: The tool names in function calls should be prefixed with the server na
                     ]
                 })
                 
-                # Execute each tool call
+                # Parse tool calls and group them by server
+                results: Dict[str, Tuple[Dict[str, Any], Optional[Dict[str, Any]]]] = {}
+                calls_by_server: Dict[str, List[Tuple[Any, str, Dict[str, Any]]]] = {}
                 for tool_call in assistant_message.tool_calls:
                     try:
-                        # Parse server and tool name
+                        # Resolve server and tool name, falling back to parsing unknown names
                         full_tool_name = tool_call.function.name
-                        if "__" in full_tool_name:
-                            server_name, tool_name = full_tool_name.split("__", 1)
+                        route = tool_routes.get(full_tool_name)
+                        if route is not None:
+                            server_name, tool_name = route
                         else:
-                            logger.warning(f"Invalid tool name format: {full_tool_name}")
-                            continue
+                            server_name, separator, tool_name = full_tool_name.partition("__")
+                            if not separator:
+                                logger.warning("Invalid tool name format: %s", full_tool_name)
+                                continue
                         
                         # Parse arguments
                         arguments = json.loads(tool_call.function.arguments)
                         
-                        # Execute tool via MCP client
                         if server_name in mcp_clients:
-                            client = mcp_clients[server_name]
-                            async with client as session:
-                                result = await session.call_tool(tool_name, arguments)
-                                
-                                tool_calls_made.append({
-                                    "server": server_name,
-                                    "tool": tool_name,
-                                    "arguments": arguments,
-                                    "result": str(result)
-                                })
-                                
-                                # Add tool result to conversation
-                                messages.append({
-                                    "role": "tool",
-                                    "tool_call_id": tool_call.id,
-                                    "content": str(result)
-                                })
-                                
-                                logger.info(f"✅ Tool executed: {server_name}.{tool_name}")
+                            calls_by_server.setdefault(server_name, []).append((tool_call, tool_name, arguments))
                         else:
-                            logger.error(f"❌ Server not found: {server_name}")
-                            messages.append({
-                                "role": "tool",
-                                "tool_call_id": tool_call.id,
-                                "content": f"Error: Server {server_name} not available"
-                            })
+                            logger.error("❌ Server not found: %s", server_name)
+                            results[tool_call.id] = (
+                                self._tool_message(tool_call.id, f"Error: Server {server_name} not available"),
+                                None
+                            )
                     
                     except Exception as e:
-                        logger.error(f"❌ Tool execution failed: {e}")
-                        messages.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "content": f"Error executing tool: {str(e)}"
-                        })
+                        logger.error("❌ Tool execution failed: %s", e)
+                        results[tool_call.id] = (
+                            self._tool_message(tool_call.id, f"Error executing tool: {str(e)}"),
+                            None
+                        )
+                
+                # Different servers are called concurrently
+                server_results = await asyncio.gather(*(
+                    self._execute_server_tool_calls(server_name, get_client, calls)
+                    for server_name, calls in calls_by_server.items()
+                ))
+                for server_result in server_results:
+                    results.update(server_result)
+                
+                # Add tool results to conversation in the order they were requested
+                for tool_call in assistant_message.tool_calls:
+                    if tool_call.id in results:
+                        tool_message, call_made = results[tool_call.id]
+                        if call_made is not None:
+                            tool_calls_made.append(call_made)
+                        messages.append(tool_message)
                 
                 # Get final response with tool results
                 final_response = await self.client.chat.completions.create(
@@ -202,7 +278,7 @@ Remember: The tool names in function calls should be prefixed with the server na
                 # No tool calls needed
                 final_content = assistant_message.content
             
-            logger.info(f"💬 Chat response generated successfully")
+            logger.info("💬 Chat response generated successfully")
             
             return ChatResponse(
                 response=final_content,
@@ -211,7 +287,7 @@ Remember: The tool names in function calls should be prefixed with the server na
             )
             
         except Exception as e:
-            logger.error(f"❌ Chat processing failed: {e}")
+            logger.error("❌ Chat processing failed: %s", e)
             return ChatResponse(
                 response=f"I apologize, but I encountered an error: {str(e)}",
                 tool_calls_made=[],
@@ -5,18 +5,27 @@ Loads all MCP server details and provides chat interface with dynamic tool calli
 """
 
 import asyncio
+import hashlib
 import logging
 import json
 import os
-from typing import Dict, List, Any, Optional
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Dict, List, Any, Optional, Tuple
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+from functools import lru_cache
+from urllib.parse import urlsplit
+import httpx
+import orjson
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
 # FastMCP 2.0 imports
 from fastmcp import Client
+from fastmcp.client.transports import StreamableHttpTransport
 
 # Chat functionality
 from chat_handler import ChatHandler, ChatMessage, ChatResponse
@@ -29,7 +38,8 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Data models
-class MCPServerConfig(BaseModel):
+@dataclass(slots=True, frozen=True)
+class MCPServerConfig:
     name: str
     url: str
     description: str = ""
@@ -60,6 +70,37 @@ class ServerDetails(BaseModel):
     resources: List[ResourceInfo] = []
     prompts: List[PromptInfo] = []
 
+# Compact in-memory catalog records; the Pydantic models above describe the HTTP responses
+@dataclass(slots=True, frozen=True)
+class ToolRecord:
+    name: str
+    description: str
+    title: Optional[str] = None
+    input_schema: Dict[str, Any] = field(default_factory=dict)
+    annotations: Optional[Dict[str, Any]] = None
+
+@dataclass(slots=True, frozen=True)
+class ResourceRecord:
+    uri: str
+    name: str
+    description: str = ""
+    mime_type: str = ""
+
+@dataclass(slots=True, frozen=True)
+class PromptRecord:
+    name: str
+    description: str = ""
+    arguments: List[Dict[str, Any]] = field(default_factory=list)
+
+@dataclass(slots=True, frozen=True)
+class ServerRecord:
+    name: str
+    description: str
+    status: str
+    tools: List[ToolRecord] = field(default_factory=list)
+    resources: List[ResourceRecord] = field(default_factory=list)
+    prompts: List[PromptRecord] = field(default_factory=list)
+
 class ToolCallRequest(BaseModel):
     server_name: str
     tool_name: str
@@ -70,34 +111,82 @@ class ToolResult(BaseModel):
     result: Any = None
     error: Optional[str] = None
 
+# Largest batch accepted by /tools/call/batch; bigger requests get a 422
+MAX_BATCH_CALLS = 100
+
+class ToolCallBatchRequest(BaseModel):
+    calls: List[ToolCallRequest] = Field(max_length=MAX_BATCH_CALLS)
+
+class ToolCallBatchResponse(BaseModel):
+    results: List[ToolResult]
+
 # Global storage for loaded server details
-server_details: Dict[str, ServerDetails] = {}
+server_details: Dict[str, ServerRecord] = {}
 mcp_clients: Dict[str, Client] = {}
+
+# Background tasks holding each client's session open, with the event that stops them
+_client_sessions: Dict[str, Tuple[asyncio.Task, asyncio.Event]] = {}
+
+# Per-server locks so reconnecting one server never waits on another
+_reconnect_locks: Dict[str, asyncio.Lock] = {}
 chat_handler: Optional[ChatHandler] = None
 
+# Aggregated catalog caches, rebuilt whenever server_details changes
+_servers_cache: Dict[str, Dict[str, Any]] = {}
+_tools_cache: List[Dict[str, Any]] = []
+_resources_cache: List[Dict[str, Any]] = []
+_prompts_cache: List[Dict[str, Any]] = []
+_counts: Dict[str, int] = {"tools": 0, "resources": 0, "prompts": 0}
+_catalog_etag: str = '""'
+_status_snapshot: Dict[str, Any] = {"server_names": [], "healthy_servers": 0, "server_status": {}}
+# Encoded /health bodies keyed by chat availability, cleared with the snapshot
+_health_bodies: Dict[bool, bytes] = {}
+
+# Keep-alive HTTP/2 connection pool shared by all streamable-http MCP clients
+_shared_http_transport: Optional[httpx.AsyncHTTPTransport] = None
+
 # Configuration file path
 CONFIG_FILE_PATH = "/Users/amitj/Documents/code2.0/mcp-py/client/mcp_config.json"
 
+# Never compared, and repr would print the API key
+@dataclass(slots=True, frozen=True, eq=False, repr=False)
+class AzureOpenAISettings:
+    endpoint: Optional[str]
+    api_key: Optional[str]
+    api_version: str
+    deployment_name: str
+    
+    @property
+    def configured(self) -> bool:
+        return bool(self.endpoint and self.api_key)
+
+@lru_cache(maxsize=1)
+def get_azure_openai_settings() -> AzureOpenAISettings:
+    """Read the Azure OpenAI settings from the environment once per process."""
+    return AzureOpenAISettings(
+        endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview"),
+        deployment_name=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4")
+    )
+
 def initialize_chat_handler():
     """Initialize Azure OpenAI chat handler."""
     global chat_handler
     
     try:
-        azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        api_key = os.getenv("AZURE_OPENAI_API_KEY")
-        api_version = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
-        deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4")
+        settings = get_azure_openai_settings()
         
-        if not azure_endpoint or not api_key:
+        if not settings.configured:
             logger.warning("⚠️ Azure OpenAI credentials not found in environment. Chat functionality disabled.")
             logger.info("💡 Create a .env file with AZURE_OPENAI_ENDPOINT and AZURE_OPENAI_API_KEY")
             return
         
         chat_handler = ChatHandler(
-            azure_endpoint=azure_endpoint,
-            api_key=api_key,
-            api_version=api_version,
-            deployment_name=deployment_name
+            azure_endpoint=settings.endpoint,
+            api_key=settings.api_key,
+            api_version=settings.api_version,
+            deployment_name=settings.deployment_name
         )
         logger.info("✅ Chat handler initialized successfully")
         
@@ -105,6 +194,14 @@ def initialize_chat_handler():
         logger.error(f"❌ Failed to initialize chat handler: {e}")
         chat_handler = None
 
+async def close_chat_handler():
+    """Close the chat handler's Azure OpenAI client and drop the handler."""
+    global chat_handler
+    
+    if chat_handler is not None:
+        await chat_handler.close()
+        chat_handler = None
+
 def load_mcp_config() -> List[MCPServerConfig]:
     """Load MCP server configuration from JSON file."""
     try:
@@ -130,87 +227,173 @@ def load_mcp_config() -> List[MCPServerConfig]:
         logger.error(f"Failed to load config from {CONFIG_FILE_PATH}: {e}")
         return []
 
-async def load_server_details(config: MCPServerConfig) -> ServerDetails:
+class _SharedPoolTransport(httpx.AsyncBaseTransport):
+    """Forwards requests to the shared pool; closing a client leaves the pool open."""
+    
+    def __init__(self, pool: httpx.AsyncHTTPTransport):
+        self._pool = pool
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._pool.handle_async_request(request)
+    
+    async def aclose(self) -> None:
+        pass
+
+def _shared_http_client_factory(
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[httpx.Timeout] = None,
+    auth: Optional[httpx.Auth] = None,
+    **kwargs: Any,
+) -> httpx.AsyncClient:
+    """httpx client factory for MCP transports that reuses the shared connection pool."""
+    # Newer MCP SDKs pass extra httpx options such as follow_redirects
+    kwargs.setdefault("follow_redirects", True)
+    return httpx.AsyncClient(
+        transport=_SharedPoolTransport(_shared_http_transport),
+        headers=headers,
+        timeout=timeout if timeout is not None else httpx.Timeout(30.0),
+        auth=auth,
+        **kwargs
+    )
+
+def _create_client(url: str) -> Client:
+    """Create a FastMCP client, routing streamable-http servers through the shared pool."""
+    parts = urlsplit(url)
+    is_sse = parts.path.rstrip("/").endswith("/sse")
+    if _shared_http_transport is not None and parts.scheme in ("http", "https") and not is_sse:
+        return Client(StreamableHttpTransport(url, httpx_client_factory=_shared_http_client_factory))
+    return Client(url)
+
+async def _hold_session(client: Client, connected: asyncio.Future, stop: asyncio.Event):
+    """Keep an MCP client session open until stop is set."""
+    try:
+        async with client:
+            connected.set_result(None)
+            await stop.wait()
+    except Exception as e:
+        if not connected.done():
+            connected.set_exception(e)
+        else:
+            logger.warning(f"MCP session closed with error: {e}")
+
+async def _open_session(name: str, client: Client):
+    """Open a persistent session for a client and wait until it is connected."""
+    connected = asyncio.get_running_loop().create_future()
+    stop = asyncio.Event()
+    task = asyncio.create_task(_hold_session(client, connected, stop))
+    _client_sessions[name] = (task, stop)
+    await connected
+
+async def _close_sessions():
+    """Close every persistent MCP client session."""
+    sessions = list(_client_sessions.values())
+    _client_sessions.clear()
+    # A reload may drop servers, so forget their reconnect locks as well
+    _reconnect_locks.clear()
+    for _, stop in sessions:
+        stop.set()
+    await asyncio.gather(*(task for task, _ in sessions), return_exceptions=True)
+
+async def get_connected_client(name: str) -> Client:
+    """Return the warm client for a server, reopening its session if it has dropped."""
+    client = mcp_clients[name]
+    if client.is_connected():
+        return client
+    
+    lock = _reconnect_locks.get(name)
+    if lock is None:
+        lock = _reconnect_locks[name] = asyncio.Lock()
+    async with lock:
+        if not client.is_connected():
+            logger.info("🔌 Reconnecting to %s...", name)
+            previous = _client_sessions.pop(name, None)
+            if previous is not None:
+                previous[1].set()
+            await _open_session(name, client)
+    return client
+
+def _to_plain(value: Any) -> Any:
+    """Dump MCP SDK models to plain dicts so records stay JSON-serializable."""
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(exclude_none=True)
+    return value
+
+def _build_tool_infos(tools_list: List[Any]) -> List[ToolRecord]:
+    """Convert raw MCP tool definitions into ToolRecord entries."""
+    tools = []
+    for tool in tools_list:
+        tools.append(ToolRecord(
+            name=tool.name,
+            description=tool.description or "",
+            title=getattr(tool, 'title', tool.name),
+            input_schema=tool.inputSchema or {},
+            annotations=_to_plain(getattr(tool, 'annotations', None)) or {}  # Handle None
+        ))
+    return tools
+
+def _build_resource_infos(resources_list: List[Any]) -> List[ResourceRecord]:
+    """Convert raw MCP resource definitions into ResourceRecord entries."""
+    resources = []
+    for resource in resources_list:
+        uri = str(resource.uri)  # Convert to string
+        resources.append(ResourceRecord(
+            uri=uri,
+            name=resource.name or uri,
+            description=resource.description or "",
+            mime_type=resource.mimeType or ""
+        ))
+    return resources
+
+def _build_prompt_infos(prompts_list: List[Any]) -> List[PromptRecord]:
+    """Convert raw MCP prompt definitions into PromptRecord entries."""
+    prompts = []
+    for prompt in prompts_list:
+        prompts.append(PromptRecord(
+            name=prompt.name,
+            description=prompt.description or "",
+            arguments=[_to_plain(arg) for arg in prompt.arguments or []]
+        ))
+    return prompts
+
+async def _discover_stage(server_name: str, kind: str, request: Awaitable[Any], build: Callable[[List[Any]], list]) -> list:
+    """Run one discovery request and build its records, returning [] if it fails."""
+    try:
+        response = await request
+        
+        # Handle different response formats; FastMCP 2.x returns plain lists
+        if isinstance(response, list):
+            items = response
+        else:
+            items = getattr(response, kind, None) or []
+        
+        # Record construction runs in the default executor to keep the event loop free
+        return await asyncio.get_running_loop().run_in_executor(None, build, items)
+    except Exception as e:
+        logger.warning("Could not load %s from %s: %s", kind, server_name, e)
+        return []
+
+async def load_server_details(config: MCPServerConfig) -> ServerRecord:
     """Load complete server details - tools, resources, prompts."""
     try:
         logger.info(f"Loading details for {config.name}...")
         
         # Connect to MCP server using FastMCP 2.0 pattern
-        client = Client(config.url)
+        client = _create_client(config.url)
         
         # Store client for later use
         mcp_clients[config.name] = client
         
-        # Get tools using FastMCP 2.0 context manager
-        tools = []
-        resources = []
-        prompts = []
+        # The session stays open for later tool calls instead of reconnecting per request
+        await _open_session(config.name, client)
         
-        async with client as session:
-            try:
-                tools_response = await session.list_tools()
-                
-                # Handle different response formats
-                if hasattr(tools_response, 'tools'):
-                    tools_list = tools_response.tools
-                elif isinstance(tools_response, list):
-                    tools_list = tools_response
-                else:
-                    tools_list = []
-                    
-                for tool in tools_list:
-                    tools.append(ToolInfo(
-                        name=tool.name,
-                        description=tool.description or "",
-                        title=getattr(tool, 'title', tool.name),
-                        input_schema=tool.inputSchema or {},
-                        annotations=getattr(tool, 'annotations', None) or {}  # Handle None
-                    ))
-            except Exception as e:
-                logger.warning(f"Could not load tools from {config.name}: {e}")
-            
-            # Get resources
-            try:
-                resources_response = await session.list_resources()
-                # Handle different response formats
-                if hasattr(resources_response, 'resources'):
-                    resources_list = resources_response.resources
-                elif isinstance(resources_response, list):
-                    resources_list = resources_response
-                else:
-                    resources_list = []
-                    
-                for resource in resources_list:
-                    resources.append(ResourceInfo(
-                        uri=str(resource.uri),  # Convert to string
-                        name=resource.name or str(resource.uri),
-                        description=resource.description or "",
-                        mime_type=resource.mimeType or ""
-                    ))
-            except Exception as e:
-                logger.warning(f"Could not load resources from {config.name}: {e}")
-            
-            # Get prompts
-            try:
-                prompts_response = await session.list_prompts()
-                # Handle different response formats
-                if hasattr(prompts_response, 'prompts'):
-                    prompts_list = prompts_response.prompts
-                elif isinstance(prompts_response, list):
-                    prompts_list = prompts_response
-                else:
-                    prompts_list = []
-                    
-                for prompt in prompts_list:
-                    prompts.append(PromptInfo(
-                        name=prompt.name,
-                        description=prompt.description or "",
-                        arguments=prompt.arguments or []
-                    ))
-            except Exception as e:
-                logger.warning(f"Could not load prompts from {config.name}: {e}")
+        # Tools, resources and prompts are discovered concurrently; each stage fails on its own
+        tools, resources, prompts = await asyncio.gather(
+            _discover_stage(config.name, "tools", client.list_tools(), _build_tool_infos),
+            _discover_stage(config.name, "resources", client.list_resources(), _build_resource_infos),
+            _discover_stage(config.name, "prompts", client.list_prompts(), _build_prompt_infos)
+        )
         
-        details = ServerDetails(
+        details = ServerRecord(
             name=config.name,
             description=config.description,
             status="connected",
@@ -224,7 +407,7 @@ async def load_server_details(config: MCPServerConfig) -> ServerDetails:
         
     except Exception as e:
         logger.error(f"❌ Failed to load {config.name}: {e}")
-        return ServerDetails(
+        return ServerRecord(
             name=config.name,
             description=config.description,
             status="error",
@@ -233,6 +416,72 @@ async def load_server_details(config: MCPServerConfig) -> ServerDetails:
             prompts=[]
         )
 
+def _rebuild_caches():
+    """Rebuild aggregated tool/resource/prompt caches and counters from server_details."""
+    global _servers_cache, _tools_cache, _resources_cache, _prompts_cache, _catalog_etag
+    
+    servers = {name: asdict(details) for name, details in server_details.items()}
+    tools = []
+    resources = []
+    prompts = []
+    for server_name, details in server_details.items():
+        for tool in details.tools:
+            tool_data = asdict(tool)
+            tool_data["server"] = server_name
+            tools.append(tool_data)
+        for resource in details.resources:
+            resource_data = asdict(resource)
+            resource_data["server"] = server_name
+            resources.append(resource_data)
+        for prompt in details.prompts:
+            prompt_data = asdict(prompt)
+            prompt_data["server"] = server_name
+            prompts.append(prompt_data)
+    
+    _servers_cache = servers
+    _tools_cache = tools
+    _resources_cache = resources
+    _prompts_cache = prompts
+    _counts["tools"] = len(tools)
+    _counts["resources"] = len(resources)
+    _counts["prompts"] = len(prompts)
+    
+    server_status = {name: details.status for name, details in server_details.items()}
+    _status_snapshot["server_names"] = list(server_status)
+    _status_snapshot["healthy_servers"] = sum(1 for status in server_status.values() if status == "connected")
+    _status_snapshot["server_status"] = server_status
+    _health_bodies.clear()
+    
+    catalog = orjson.dumps(list(servers.values()), default=str, option=orjson.OPT_SORT_KEYS)
+    _catalog_etag = f'"{hashlib.sha256(catalog).hexdigest()[:16]}"'
+
+def _catalog_cache_headers() -> Dict[str, str]:
+    """Cache headers sent with both the catalog and its 304 revalidations."""
+    # Browsers may keep the catalog but must revalidate it, which is a cheap 304 until reload
+    return {"Cache-Control": "no-cache", "ETag": _catalog_etag}
+
+def _not_modified(request: Request, response: Response) -> bool:
+    """Set the catalog cache headers on the response and check the ETag against If-None-Match."""
+    response.headers.update(_catalog_cache_headers())
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison, so W/"..." (e.g. from a gzip-ing proxy) still matches
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == _catalog_etag:
+            return True
+    return False
+
+# Records per NDJSON chunk, so large catalogs stream without a write and gzip flush per line
+NDJSON_CHUNK_SIZE = 200
+
+async def _ndjson_chunks(items: List[Any]):
+    """Yield items as newline-delimited JSON, NDJSON_CHUNK_SIZE lines per chunk."""
+    # An async generator keeps StreamingResponse on the event loop instead of a threadpool hop per chunk
+    for start in range(0, len(items), NDJSON_CHUNK_SIZE):
+        yield b"".join(orjson.dumps(item) + b"\n" for item in items[start:start + NDJSON_CHUNK_SIZE])
+
 async def load_all_servers():
     """Load details from all configured MCP servers."""
     logger.info("🚀 Loading all MCP server details...")
@@ -242,18 +491,25 @@ async def load_all_servers():
     
     if not mcp_servers:
         logger.warning("No MCP servers configured!")
+        _rebuild_caches()
         return
     
-    for config in mcp_servers:
-        details = await load_server_details(config)
+    # Load servers concurrently, but cap in-flight connects so a large
+    # config does not hit every backend at once; gather keeps config order
+    semaphore = asyncio.Semaphore(int(os.getenv("MCP_MAX_PARALLEL_LOADS", "16")))
+    
+    async def load_bounded(config: MCPServerConfig) -> ServerRecord:
+        async with semaphore:
+            return await load_server_details(config)
+    
+    results = await asyncio.gather(*(load_bounded(config) for config in mcp_servers))
+    for config, details in zip(mcp_servers, results):
         server_details[config.name] = details
     
-    # Summary
-    total_tools = sum(len(details.tools) for details in server_details.values())
-    total_resources = sum(len(details.resources) for details in server_details.values())
-    total_prompts = sum(len(details.prompts) for details in server_details.values())
+    _rebuild_caches()
     
-    logger.info(f"📊 Summary: {len(server_details)} servers, {total_tools} tools, {total_resources} resources, {total_prompts} prompts")
+    # Summary
+    logger.info(f"📊 Summary: {len(server_details)} servers, {_counts['tools']} tools, {_counts['resources']} resources, {_counts['prompts']} prompts")
     
     # Initialize chat handler after loading servers
     initialize_chat_handler()
@@ -261,51 +517,58 @@ async def load_all_servers():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Load all server details on startup."""
+    global _shared_http_transport
+    
     # Startup
+    _shared_http_transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=50, max_connections=200, keepalive_expiry=60)
+    )
     await load_all_servers()
     
     yield
     
     # Shutdown
     logger.info("🧹 Cleaning up connections...")
-    for client in mcp_clients.values():
-        try:
-            # FastMCP 2.0 clients handle cleanup automatically
-            pass
-        except Exception as e:
-            logger.warning(f"Error during cleanup: {e}")
+    await _close_sessions()
+    await close_chat_handler()
+    
+    await _shared_http_transport.aclose()
+    _shared_http_transport = None
 
 # Create FastAPI app
 app = FastAPI(
     title="MCP Client Backend with Chat - Demo",
     description="MCP backend with Azure OpenAI chat integration for dynamic tool calling",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://localhost:5173"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# CORS middleware; set CORS_IN_APP=false when a reverse proxy adds the CORS headers
+if os.getenv("CORS_IN_APP", "true").lower() == "true":
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000", "http://localhost:5173"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        max_age=86400,  # let browsers cache preflight responses for a day
+    )
+
+# Compress large catalog payloads; small tool results are sent as-is
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 @app.get("/")
 async def root():
     """Root endpoint with summary."""
-    total_tools = sum(len(details.tools) for details in server_details.values())
-    total_resources = sum(len(details.resources) for details in server_details.values())
-    total_prompts = sum(len(details.prompts) for details in server_details.values())
-    
     return {
         "message": "MCP Client Backend with Chat - Demo",
         "servers_loaded": len(server_details),
-        "total_tools": total_tools,
-        "total_resources": total_resources,
-        "total_prompts": total_prompts,
-        "server_names": list(server_details.keys()),
+        "total_tools": _counts["tools"],
+        "total_resources": _counts["resources"],
+        "total_prompts": _counts["prompts"],
+        "server_names": _status_snapshot["server_names"],
         "chat_available": chat_handler is not None
     }
 
@@ -322,88 +585,110 @@ async def chat_with_llm(request: ChatMessage):
     
     try:
         # Get all available tools in the format needed for LLM
-        all_tools = []
-        for server_name, details in server_details.items():
-            for tool in details.tools:
-                tool_data = tool.dict()
-                tool_data["server"] = server_name
-                all_tools.append(tool_data)
+        all_tools = _tools_cache
         
-        logger.info(f"🤖 Processing chat with {len(all_tools)} available tools")
+        logger.info("🤖 Processing chat with %d available tools", len(all_tools))
         
         # Process chat with available tools
         response = await chat_handler.chat_with_tools(
             message=request.message,
             available_tools=all_tools,
-            mcp_clients=mcp_clients
+            mcp_clients=mcp_clients,
+            get_client=get_connected_client
         )
         
         return response
         
     except Exception as e:
-        logger.error(f"❌ Chat processing failed: {e}")
+        logger.error("❌ Chat processing failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
 
 @app.get("/chat/status")
 async def chat_status():
     """Check if chat functionality is available."""
+    settings = get_azure_openai_settings()
     return {
         "chat_available": chat_handler is not None,
-        "azure_openai_configured": bool(os.getenv("AZURE_OPENAI_ENDPOINT") and os.getenv("AZURE_OPENAI_API_KEY")),
-        "deployment_name": os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4"),
-        "tools_available": sum(len(details.tools) for details in server_details.values())
+        "azure_openai_configured": settings.configured,
+        "deployment_name": settings.deployment_name,
+        "tools_available": _counts["tools"]
     }
 
 # === SERVER MANAGEMENT ENDPOINTS ===
 
-@app.get("/servers", response_model=List[ServerDetails])
-async def get_all_servers():
+# The cached payloads already match ServerDetails, so skip response validation
+# and keep the schema in the docs through `responses`
+@app.get("/servers", response_model=None, responses={200: {"model": List[ServerDetails]}})
+async def get_all_servers(request: Request, response: Response):
     """Get all loaded server details (tools, resources, prompts)."""
-    return list(server_details.values())
+    if _not_modified(request, response):
+        return Response(status_code=304, headers=_catalog_cache_headers())
+    return list(_servers_cache.values())
 
-@app.get("/servers/{server_name}", response_model=ServerDetails)
-async def get_server_details(server_name: str):
+@app.get("/servers/{server_name}", response_model=None, responses={200: {"model": ServerDetails}})
+async def get_server_details(server_name: str, request: Request, response: Response):
     """Get specific server details."""
-    if server_name not in server_details:
+    if server_name not in _servers_cache:
         raise HTTPException(404, f"Server {server_name} not found")
     
-    return server_details[server_name]
+    if _not_modified(request, response):
+        return Response(status_code=304, headers=_catalog_cache_headers())
+    
+    return _servers_cache[server_name]
 
 @app.get("/tools")
-async def get_all_tools():
+async def get_all_tools(request: Request, response: Response):
     """Get all tools from all servers."""
-    all_tools = []
-    for server_name, details in server_details.items():
-        for tool in details.tools:
-            tool_data = tool.dict()
-            tool_data["server"] = server_name
-            all_tools.append(tool_data)
-    
-    return {"tools": all_tools, "total": len(all_tools)}
+    if _not_modified(request, response):
+        return Response(status_code=304, headers=_catalog_cache_headers())
+    return {"tools": _tools_cache, "total": _counts["tools"]}
+
+@app.get("/servers.ndjson")
+async def stream_all_servers():
+    """Stream all server details as NDJSON, one server per line."""
+    return StreamingResponse(_ndjson_chunks(list(_servers_cache.values())), media_type="application/x-ndjson")
+
+@app.get("/tools.ndjson")
+async def stream_all_tools():
+    """Stream all tools from all servers as NDJSON, one tool per line."""
+    return StreamingResponse(_ndjson_chunks(_tools_cache), media_type="application/x-ndjson")
+
+@app.get("/resources.ndjson")
+async def stream_all_resources():
+    """Stream all resources from all servers as NDJSON, one resource per line."""
+    return StreamingResponse(_ndjson_chunks(_resources_cache), media_type="application/x-ndjson")
+
+@app.get("/prompts.ndjson")
+async def stream_all_prompts():
+    """Stream all prompts from all servers as NDJSON, one prompt per line."""
+    return StreamingResponse(_ndjson_chunks(_prompts_cache), media_type="application/x-ndjson")
 
 @app.get("/resources")
-async def get_all_resources():
+async def get_all_resources(request: Request, response: Response):
     """Get all resources from all servers."""
-    all_resources = []
-    for server_name, details in server_details.items():
-        for resource in details.resources:
-            resource_data = resource.dict()
-            resource_data["server"] = server_name
-            all_resources.append(resource_data)
-    
-    return {"resources": all_resources, "total": len(all_resources)}
+    if _not_modified(request, response):
+        return Response(status_code=304, headers=_catalog_cache_headers())
+    return {"resources": _resources_cache, "total": _counts["resources"]}
 
 @app.get("/prompts")
-async def get_all_prompts():
+async def get_all_prompts(request: Request, response: Response):
     """Get all prompts from all servers."""
-    all_prompts = []
-    for server_name, details in server_details.items():
-        for prompt in details.prompts:
-            prompt_data = prompt.dict()
-            prompt_data["server"] = server_name
-            all_prompts.append(prompt_data)
-    
-    return {"prompts": all_prompts, "total": len(all_prompts)}
+    if _not_modified(request, response):
+        return Response(status_code=304, headers=_catalog_cache_headers())
+    return {"prompts": _prompts_cache, "total": _counts["prompts"]}
+
+async def _execute_tool_call(request: ToolCallRequest) -> ToolResult:
+    """Call one tool over its server's persistent session, reporting failures in the result."""
+    try:
+        client = await get_connected_client(request.server_name)
+        result = await client.call_tool(request.tool_name, request.arguments)
+        
+        logger.info("✅ Tool call: %s.%s", request.server_name, request.tool_name)
+        return ToolResult.model_construct(success=True, result=str(result))
+        
+    except Exception as e:
+        logger.error("❌ Tool call failed: %s", e)
+        return ToolResult.model_construct(success=False, error=str(e))
 
 @app.post("/tools/call", response_model=ToolResult)
 async def call_tool(request: ToolCallRequest):
@@ -411,19 +696,22 @@ async def call_tool(request: ToolCallRequest):
     if request.server_name not in mcp_clients:
         raise HTTPException(404, f"Server {request.server_name} not connected")
     
-    try:
-        client = mcp_clients[request.server_name]
-        
-        # Use FastMCP 2.0 context manager for tool calls
-        async with client as session:
-            result = await session.call_tool(request.tool_name, request.arguments)
-            
-            logger.info(f"✅ Tool call: {request.server_name}.{request.tool_name}")
-            return ToolResult(success=True, result=str(result))
-        
-    except Exception as e:
-        logger.error(f"❌ Tool call failed: {e}")
-        return ToolResult(success=False, error=str(e))
+    return await _execute_tool_call(request)
+
+@app.post("/tools/call/batch", response_model=ToolCallBatchResponse)
+async def call_tools_batch(request: ToolCallBatchRequest):
+    """Execute several tool calls concurrently; results come back in request order."""
+    # Cap in-flight calls so one batch does not flood the persistent sessions
+    semaphore = asyncio.Semaphore(int(os.getenv("MCP_MAX_PARALLEL_TOOL_CALLS", "16")))
+    
+    async def run(call: ToolCallRequest) -> ToolResult:
+        if call.server_name not in mcp_clients:
+            return ToolResult.model_construct(success=False, error=f"Server {call.server_name} not connected")
+        async with semaphore:
+            return await _execute_tool_call(call)
+    
+    results = await asyncio.gather(*(run(call) for call in request.calls))
+    return ToolCallBatchResponse.model_construct(results=list(results))
 
 # === CONFIGURATION ENDPOINTS ===
 
@@ -434,7 +722,7 @@ async def get_config():
         mcp_servers = load_mcp_config()
         return {
             "config_file": CONFIG_FILE_PATH,
-            "servers": [server.dict() for server in mcp_servers]
+            "servers": [asdict(server) for server in mcp_servers]
         }
     except Exception as e:
         raise HTTPException(500, f"Error loading config: {str(e)}")
@@ -442,54 +730,60 @@ async def get_config():
 @app.post("/config/reload")
 async def reload_config():
     """Reload configuration from file and reconnect to servers."""
-    global server_details, mcp_clients, chat_handler
+    global server_details, mcp_clients
     
     logger.info("🔄 Reloading configuration from file...")
     
-    # Clear existing clients
-    for client in mcp_clients.values():
-        try:
-            pass  # FastMCP 2.0 handles cleanup automatically
-        except:
-            pass
+    # Close existing client sessions and chat client
+    await _close_sessions()
+    await close_chat_handler()
     
     # Clear storage
     server_details.clear()
     mcp_clients.clear()
-    chat_handler = None
     
     # Reload from config file
     await load_all_servers()
     
-    total_tools = sum(len(details.tools) for details in server_details.values())
-    
     return {
         "message": "Configuration reloaded from file", 
         "config_file": CONFIG_FILE_PATH,
         "servers_loaded": len(server_details),
-        "total_tools": total_tools,
+        "total_tools": _counts["tools"],
         "chat_available": chat_handler is not None
     }
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    healthy_servers = [name for name, details in server_details.items() if details.status == "connected"]
-    
-    return {
-        "status": "healthy",
-        "servers_loaded": len(server_details),
-        "healthy_servers": len(healthy_servers),
-        "server_status": {name: details.status for name, details in server_details.items()},
-        "chat_available": chat_handler is not None
-    }
+    chat_available = chat_handler is not None
+    body = _health_bodies.get(chat_available)
+    if body is None:
+        body = orjson.dumps({
+            "status": "healthy",
+            "servers_loaded": len(_status_snapshot["server_status"]),
+            "healthy_servers": _status_snapshot["healthy_servers"],
+            "server_status": _status_snapshot["server_status"],
+            "chat_available": chat_available
+        })
+        _health_bodies[chat_available] = body
+    return Response(content=body, media_type="application/json", headers={"Cache-Control": "no-store"})
 
 if __name__ == "__main__":
     import uvicorn
+    
+    # Auto-reload is for development only and requires a single worker;
+    # each worker process loads its own catalog and MCP clients on startup
+    debug = os.getenv("DEBUG", "false").lower() == "true"
+    workers = 1 if debug else int(os.getenv("UVICORN_WORKERS", "1"))
+    
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8001,
-        reload=True,
-        log_level="info"
+        reload=debug,
+        workers=workers,
+        log_level="info",
+        loop="uvloop",
+        http="httptools"
     )
@@ -4,16 +4,101 @@ A simple MCP server that provides basic arithmetic operations.
 Supports both stdio and streamable-http transports.
 """
 
-import asyncio
+import ast
+import operator
 import os
-from typing import Any, Dict
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List
+import uvicorn
 from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.resources import TextResource
 
 
 # Initialize FastMCP server
 mcp = FastMCP("Calculator")
 
 
+@dataclass(slots=True, frozen=True)
+class AppConfig:
+    """Startup settings, read from the environment once."""
+    transport: str
+    host: str
+    port: int
+
+
+def load_app_config(default_transport: str) -> AppConfig:
+    """Snapshot MCP_TRANSPORT/MCP_HOST/MCP_PORT, falling back to the FastMCP settings for the address."""
+    return AppConfig(
+        transport=os.getenv("MCP_TRANSPORT", default_transport),
+        host=os.getenv("MCP_HOST", mcp.settings.host),
+        port=int(os.getenv("MCP_PORT", str(mcp.settings.port)))
+    )
+
+# Anything outside digits, basic operators, parentheses and spaces
+_INVALID_EXPRESSION_CHARS = re.compile(r"[^0-9+\-*/.() ]")
+
+# Longest expression accepted; keeps the parser and the result cache bounded
+MAX_EXPRESSION_LENGTH = 1000
+
+# Operators allowed in calculate_expression; ** is excluded so huge powers cannot be requested
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+}
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+def _evaluate_node(node: ast.AST) -> float:
+    """Evaluate a parsed arithmetic expression node using the operator tables.
+
+    Walks the tree with an explicit stack, so long operator chains cannot hit the recursion limit.
+    """
+    values: List[float] = []
+    pending = [(node, False)]
+    while pending:
+        node, operands_ready = pending.pop()
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            if operands_ready:
+                right = values.pop()
+                values.append(_BINARY_OPERATORS[type(node.op)](values.pop(), right))
+            else:
+                pending.extend(((node, True), (node.right, False), (node.left, False)))
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+            if operands_ready:
+                values.append(_UNARY_OPERATORS[type(node.op)](values.pop()))
+            else:
+                pending.extend(((node, True), (node.operand, False)))
+        elif isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            values.append(node.value)
+        else:
+            raise ValueError(f"Unsupported syntax: {type(getattr(node, 'op', node)).__name__}")
+    return values[0]
+
+
+@lru_cache(maxsize=1024)
+def _evaluate_expression(expression: str) -> float:
+    """Parse and evaluate an arithmetic expression without eval(); results are cached per string."""
+    return _evaluate_node(ast.parse(expression, mode="eval").body)
+
+
+def _arithmetic_result(operation: str, symbol: str, a: float, b: float, result: float) -> Dict[str, Any]:
+    """Build the result payload shared by the two-operand arithmetic tools."""
+    return {
+        "operation": operation,
+        "operands": [a, b],
+        "result": result,
+        "expression": f"{a} {symbol} {b} = {result}"
+    }
+
+
 @mcp.tool()
 async def add(a: float, b: float) -> Dict[str, Any]:
     """
@@ -27,12 +112,7 @@ async def add(a: float, b: float) -> Dict[str, Any]:
         Dictionary containing the operation, operands, and result
     """
     result = a + b
-    return {
-        "operation": "addition",
-        "operands": [a, b],
-        "result": result,
-        "expression": f"{a} + {b} = {result}"
-    }
+    return _arithmetic_result("addition", "+", a, b, result)
 
 
 @mcp.tool()
@@ -48,12 +128,7 @@ async def subtract(a: float, b: float) -> Dict[str, Any]:
         Dictionary containing the operation, operands, and result
     """
     result = a - b
-    return {
-        "operation": "subtraction",
-        "operands": [a, b],
-        "result": result,
-        "expression": f"{a} - {b} = {result}"
-    }
+    return _arithmetic_result("subtraction", "-", a, b, result)
 
 
 @mcp.tool()
@@ -69,12 +144,7 @@ async def multiply(a: float, b: float) -> Dict[str, Any]:
         Dictionary containing the operation, operands, and result
     """
     result = a * b
-    return {
-        "operation": "multiplication",
-        "operands": [a, b],
-        "result": result,
-        "expression": f"{a} × {b} = {result}"
-    }
+    return _arithmetic_result("multiplication", "×", a, b, result)
 
 
 @mcp.tool()
@@ -96,12 +166,7 @@ async def divide(a: float, b: float) -> Dict[str, Any]:
         raise ValueError("Cannot divide by zero")
     
     result = a / b
-    return {
-        "operation": "division",
-        "operands": [a, b],
-        "result": result,
-        "expression": f"{a} ÷ {b} = {result}"
-    }
+    return _arithmetic_result("division", "÷", a, b, result)
 
 
 @mcp.tool()
@@ -117,16 +182,19 @@ async def calculate_expression(expression: str) -> Dict[str, Any]:
     
     Note:
         Only supports basic arithmetic operations (+, -, *, /) and parentheses.
-        Uses eval() for simplicity - NOT recommended for production use.
+        Expressions are evaluated from their syntax tree, never with eval(),
+        and results are cached. Expressions longer than 1000 characters are rejected.
     """
     try:
+        if len(expression) > MAX_EXPRESSION_LENGTH:
+            raise ValueError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+        
         # Sanitize the expression to only allow basic arithmetic
-        allowed_chars = set('0123456789+-*/.() ')
-        if not all(c in allowed_chars for c in expression):
+        if _INVALID_EXPRESSION_CHARS.search(expression):
             raise ValueError("Expression contains invalid characters")
         
-        # Evaluate the expression
-        result = eval(expression)
+        # Evaluate the expression by walking its syntax tree; ast.parse rejects leading spaces that eval() allowed
+        result = _evaluate_expression(expression.strip())
         
         return {
             "operation": "expression_evaluation",
@@ -140,15 +208,8 @@ async def calculate_expression(expression: str) -> Dict[str, Any]:
         raise ValueError(f"Invalid expression: {str(e)}")
 
 
-@mcp.resource("calculator://info")
-async def get_calculator_info() -> str:
-    """
-    Get information about the calculator server capabilities.
-    
-    Returns:
-        Information about available operations
-    """
-    info = """
+# Static texts for the info resource and the math_helper prompt, built once at import
+CALCULATOR_INFO = """
     Calculator MCP Server Information
     ================================
     
@@ -169,18 +230,8 @@ async def get_calculator_info() -> str:
     - divide(15, 3) returns 5
     - calculate_expression("2 + 3 * 4") returns 14
     """
-    return info
 
-
-@mcp.prompt("math_helper")
-async def math_helper_prompt() -> str:
-    """
-    A prompt template for helping with math problems.
-    
-    Returns:
-        A prompt that guides users on how to use the calculator
-    """
-    return """
+MATH_HELPER_PROMPT = """
     I'm a calculator assistant that can help you with basic arithmetic operations.
     
     I can perform the following operations:
@@ -194,23 +245,49 @@ async def math_helper_prompt() -> str:
     Please provide the numbers or expression you'd like me to calculate.
     """
 
+# The info text never changes, so serve it as a static resource instead of calling a function per read
+mcp.add_resource(TextResource(
+    uri="calculator://info",
+    name="get_calculator_info",
+    description="Get information about the calculator server capabilities.",
+    mime_type="text/plain",
+    text=CALCULATOR_INFO
+))
+
+
+@mcp.prompt("math_helper")
+async def math_helper_prompt() -> str:
+    """
+    A prompt template for helping with math problems.
+    
+    Returns:
+        A prompt that guides users on how to use the calculator
+    """
+    return MATH_HELPER_PROMPT
+
 
 if __name__ == "__main__":
     # Get configuration from environment variables
-    transport = os.getenv("MCP_TRANSPORT", "stdio")
+    config = load_app_config(default_transport="stdio")
     
     print(f"Starting Calculator MCP Server...")
-    print(f"Transport: {transport}")
+    print(f"Transport: {config.transport}")
     
-    if transport == "streamable-http":
-        print("Server will listen on default host and port (0.0.0.0:8000)")
+    if config.transport == "streamable-http":
+        print(f"Server will listen on {config.host}:{config.port}")
         print("Endpoints available:")
-        print("  - Health check: http://0.0.0.0:8000/health")
-        print("  - MCP endpoint: http://0.0.0.0:8000/mcp")
+        print(f"  - Health check: http://{config.host}:{config.port}/health")
+        print(f"  - MCP endpoint: http://{config.host}:{config.port}/mcp")
         
-        # The official MCP SDK FastMCP.run() only accepts transport parameter
-        # Host and port are configured through other means or use defaults
-        mcp.run(transport="streamable-http" )
+        # Serve the streamable HTTP app directly so uvicorn uses uvloop and httptools
+        uvicorn.run(
+            mcp.streamable_http_app(),
+            host=config.host,
+            port=config.port,
+            log_level=mcp.settings.log_level.lower(),
+            loop="uvloop",
+            http="httptools"
+        )
     else:
         print("Running with stdio transport for local development")
         # Run with stdio transport for local development
@@ -4,16 +4,25 @@ A simple MCP server that provides basic arithmetic operations with JWT-based app
 Supports streamable-http transport with role-based access control using FastMCP Context.
 """
 
+import ast
+import operator
+import asyncio
 import os
+import re
+import time
+import hashlib
 import jwt
 import logging
-from typing import Any, Dict, List, Optional
-from functools import wraps
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache, wraps
 from mcp.server.fastmcp import FastMCP, Context
-from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 import requests
 import base64
+import uvicorn
 
 # Configure logging
 logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
@@ -25,10 +34,101 @@ ROLE_PERMISSIONS = {
     "MCP.Admin": ["add", "subtract", "multiply", "divide", "calculate_expression"]
 }
 
+# Upper bound on validated tokens kept in memory
+TOKEN_CACHE_MAX_SIZE = 1024
+
+# Re-verify cached tokens at least this often so role changes are picked up before exp
+TOKEN_CACHE_TTL_SECONDS = 300
+
+# Minimum time between JWKS downloads triggered by unknown key ids
+JWKS_MIN_REFRESH_SECONDS = 60
+
+# How long a token that failed verification is rejected without re-checking it
+REJECTED_TOKEN_TTL_SECONDS = 60
+
 # Initialize FastMCP server
 mcp = FastMCP("Calculator")
 
 
+@dataclass(slots=True, frozen=True)
+class AppConfig:
+    """Startup settings, read from the environment once."""
+    transport: str
+    host: str
+    port: int
+
+
+def load_app_config(default_transport: str) -> AppConfig:
+    """Snapshot MCP_TRANSPORT/MCP_HOST/MCP_PORT, falling back to the FastMCP settings for the address."""
+    return AppConfig(
+        transport=os.getenv("MCP_TRANSPORT", default_transport),
+        host=os.getenv("MCP_HOST", mcp.settings.host),
+        port=int(os.getenv("MCP_PORT", str(mcp.settings.port)))
+    )
+
+# Anything outside digits, basic operators, parentheses and spaces
+_INVALID_EXPRESSION_CHARS = re.compile(r"[^0-9+\-*/.() ]")
+
+# Longest expression accepted; keeps the parser and the result cache bounded
+MAX_EXPRESSION_LENGTH = 1000
+
+# Operators allowed in calculate_expression; ** is excluded so huge powers cannot be requested
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+}
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+def _evaluate_node(node: ast.AST) -> float:
+    """Evaluate a parsed arithmetic expression node using the operator tables.
+
+    Walks the tree with an explicit stack, so long operator chains cannot hit the recursion limit.
+    """
+    values: List[float] = []
+    pending = [(node, False)]
+    while pending:
+        node, operands_ready = pending.pop()
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            if operands_ready:
+                right = values.pop()
+                values.append(_BINARY_OPERATORS[type(node.op)](values.pop(), right))
+            else:
+                pending.extend(((node, True), (node.right, False), (node.left, False)))
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+            if operands_ready:
+                values.append(_UNARY_OPERATORS[type(node.op)](values.pop()))
+            else:
+                pending.extend(((node, True), (node.operand, False)))
+        elif isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            values.append(node.value)
+        else:
+            raise ValueError(f"Unsupported syntax: {type(getattr(node, 'op', node)).__name__}")
+    return values[0]
+
+
+@lru_cache(maxsize=1024)
+def _evaluate_expression(expression: str) -> float:
+    """Parse and evaluate an arithmetic expression without eval(); results are cached per string."""
+    return _evaluate_node(ast.parse(expression, mode="eval").body)
+
+
+def _arithmetic_result(operation: str, symbol: str, a: float, b: float, result: float) -> Dict[str, Any]:
+    """Build the result payload shared by the two-operand arithmetic tools."""
+    return {
+        "operation": operation,
+        "operands": [a, b],
+        "result": result,
+        "expression": f"{a} {symbol} {b} = {result}"
+    }
+
+
 class AuthorizationError(Exception):
     """Custom exception for authorization failures"""
     def __init__(self, message: str, required_roles: List[str] = None):
@@ -45,6 +145,16 @@ class AuthorizationMiddleware:
         self.client_id = client_id or os.getenv("AZURE_CLIENT_ID")
         self.enable_auth = os.getenv("ENABLE_AUTH", "false").lower() == "true"
         self._jwks_cache = {}
+        # Serializes JWKS downloads; one download refreshes every kid
+        self._jwks_lock = threading.Lock()
+        self._jwks_fetched_at = 0.0
+        # sha256(token) -> (expires_at, roles) for tokens that already passed validation, in LRU order
+        self._token_cache: "OrderedDict[bytes, Tuple[float, Tuple[str, ...]]]" = OrderedDict()
+        # sha256(token) -> time until which the token is rejected outright
+        self._rejected_tokens: Dict[bytes, float] = {}
+        self._token_cache_lock = threading.Lock()
+        # Keep-alive session so JWKS refreshes reuse the TLS connection to Azure AD
+        self._http = requests.Session()
         
         if self.enable_auth and (not self.tenant_id or not self.client_id):
             logger.warning("Authentication enabled but missing Azure AD configuration")
@@ -55,6 +165,47 @@ class AuthorizationMiddleware:
             # If auth is disabled, return admin role for demo purposes
             return ["MCP.Admin"]
         
+        # Reuse the result of an earlier verification until the token expires
+        cache_key = hashlib.sha256(token.encode()).digest()
+        cached = self._cached_roles(cache_key)
+        if cached is not None:
+            return cached
+        return self._verify_token(token, cache_key)
+    
+    async def get_app_roles(self, token: str) -> List[str]:
+        """Extract app roles, running JWKS fetches and signature checks in a worker thread"""
+        if not self.enable_auth:
+            return ["MCP.Admin"]
+        
+        cache_key = hashlib.sha256(token.encode()).digest()
+        cached = self._cached_roles(cache_key)
+        if cached is not None:
+            return cached
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._verify_token, token, cache_key)
+    
+    def _cached_roles(self, cache_key: bytes) -> Optional[List[str]]:
+        """Return the roles of a previously verified, unexpired token"""
+        now = time.time()
+        with self._token_cache_lock:
+            cached = self._token_cache.get(cache_key)
+            if cached is not None:
+                if cached[0] > now:
+                    self._token_cache.move_to_end(cache_key)
+                    return list(cached[1])
+                self._token_cache.pop(cache_key, None)
+                return None
+            rejected_until = self._rejected_tokens.get(cache_key)
+            if rejected_until is None:
+                return None
+            if rejected_until > now:
+                return []
+            self._rejected_tokens.pop(cache_key, None)
+            return None
+    
+    def _verify_token(self, token: str, cache_key: bytes) -> List[str]:
+        """Verify the token signature and claims and return its app roles"""
         try:
             # Decode without verification first to get header
             header = jwt.get_unverified_header(token)
@@ -73,48 +224,83 @@ class AuthorizationMiddleware:
             
             # Extract app roles from token
             roles = payload.get('roles', [])
-            logger.info(f"Successfully extracted roles from token: {roles}")
+            logger.debug("Successfully extracted roles from token: %s", roles)
+            self._cache_token(cache_key, payload.get('exp'), roles)
             return roles
             
         except jwt.InvalidTokenError as e:
-            logger.warning(f"Token validation failed: {e}")
+            logger.warning("Token validation failed: %s", e)
+            self._reject_token(cache_key)
             return []
         except Exception as e:
             logger.error(f"Error extracting app roles: {e}")
             return []
     
+    def _cache_token(self, cache_key: bytes, exp: Any, roles: List[str]) -> None:
+        """Remember the roles of a verified token until its expiry or the cache TTL, whichever is first"""
+        if not isinstance(exp, (int, float)):
+            return
+        expires_at = min(float(exp), time.time() + TOKEN_CACHE_TTL_SECONDS)
+        with self._token_cache_lock:
+            self._token_cache[cache_key] = (expires_at, tuple(roles))
+            self._token_cache.move_to_end(cache_key)
+            if len(self._token_cache) > TOKEN_CACHE_MAX_SIZE:
+                # Evict the least recently used entry
+                self._token_cache.popitem(last=False)
+    
+    def _reject_token(self, cache_key: bytes) -> None:
+        """Short-circuit repeats of a token that failed signature or claims checks"""
+        with self._token_cache_lock:
+            if len(self._rejected_tokens) >= TOKEN_CACHE_MAX_SIZE:
+                self._rejected_tokens.pop(next(iter(self._rejected_tokens)), None)
+            self._rejected_tokens[cache_key] = time.time() + REJECTED_TOKEN_TTL_SECONDS
+    
     def _get_signing_key(self, kid: str):
         """Get JWT signing key from Azure AD JWKS endpoint"""
         if not self.tenant_id:
             raise ValueError("Tenant ID not configured")
         
         # Cache JWKS for performance
-        if kid in self._jwks_cache:
-            return self._jwks_cache[kid]
+        key = self._jwks_cache.get(kid)
+        if key is not None:
+            return key
+        
+        # Unknown kid: the keys may have rotated, so refresh the whole set (rate limited)
+        with self._jwks_lock:
+            # Another thread may have refreshed the keys while we waited
+            if kid not in self._jwks_cache and time.time() - self._jwks_fetched_at >= JWKS_MIN_REFRESH_SECONDS:
+                self.refresh_jwks()
         
+        key = self._jwks_cache.get(kid)
+        if key is None:
+            raise ValueError(f"Key with kid '{kid}' not found in JWKS")
+        return key
+    
+    def refresh_jwks(self) -> None:
+        """Download the tenant's JWKS and cache every signing key by kid"""
         try:
             jwks_url = f"https://login.microsoftonline.com/{self.tenant_id}/discovery/v2.0/keys"
-            response = requests.get(jwks_url, timeout=10)
+            response = self._http.get(jwks_url, timeout=10)
             response.raise_for_status()
             
             jwks = response.json()
             
-            # Find the key with matching kid
+            # Convert every published key up front
+            keys = {}
             for key in jwks.get('keys', []):
-                if key.get('kid') == kid:
-                    # Convert JWK to PEM format
-                    public_key = self._jwk_to_pem(key)
-                    self._jwks_cache[kid] = public_key
-                    return public_key
+                if key.get('kid') and key.get('kty') == 'RSA':
+                    keys[key['kid']] = self._jwk_to_key(key)
             
-            raise ValueError(f"Key with kid '{kid}' not found in JWKS")
+            self._jwks_cache = keys
+            self._jwks_fetched_at = time.time()
+            logger.debug("Loaded %d signing keys from JWKS", len(keys))
             
         except Exception as e:
-            logger.error(f"Failed to retrieve signing key: {e}")
+            logger.error(f"Failed to refresh JWKS: {e}")
             raise
     
-    def _jwk_to_pem(self, jwk: Dict) -> str:
-        """Convert JWK to PEM format"""
+    def _jwk_to_key(self, jwk: Dict) -> rsa.RSAPublicKey:
+        """Convert JWK to an RSA public key object that jwt.decode can use directly"""
         try:
             # Extract n and e from JWK
             n = base64.urlsafe_b64decode(jwk['n'] + '==')
@@ -124,19 +310,11 @@ class AuthorizationMiddleware:
             n_int = int.from_bytes(n, 'big')
             e_int = int.from_bytes(e, 'big')
             
-            # Create RSA public key
-            public_key = rsa.RSAPublicNumbers(e_int, n_int).public_key()
-            
-            # Convert to PEM
-            pem = public_key.public_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PublicFormat.SubjectPublicKeyInfo
-            )
-            
-            return pem
+            # Create RSA public key; caching the object avoids re-parsing PEM on every decode
+            return rsa.RSAPublicNumbers(e_int, n_int).public_key()
             
         except Exception as e:
-            logger.error(f"Failed to convert JWK to PEM: {e}")
+            logger.error(f"Failed to convert JWK to public key: {e}")
             raise
 
 
@@ -146,13 +324,17 @@ auth_middleware = AuthorizationMiddleware()
 
 def require_app_role(required_roles: List[str]):
     """Decorator to check if user has required app roles for tool access"""
+    # Built once per decorated tool rather than on every call
+    required_role_set = frozenset(required_roles)
+    
     def decorator(func):
+        if not auth_middleware.enable_auth:
+            # Authentication is fixed at startup, so skip the per-call wrapper entirely
+            logger.debug("Authentication disabled, allowing access to %s", func.__name__)
+            return func
+        
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            if not auth_middleware.enable_auth:
-                logger.debug(f"Authentication disabled, allowing access to {func.__name__}")
-                return await func(*args, **kwargs)
-            
             # Get FastMCP context from kwargs
             ctx = kwargs.get('ctx')
             if not ctx:
@@ -173,27 +355,27 @@ def require_app_role(required_roles: List[str]):
                 logger.error(f"Error accessing request headers for {func.__name__}: {e}")
             
             if not auth_header or not auth_header.startswith('Bearer '):
-                logger.warning(f"Missing or invalid authorization header for {func.__name__}")
+                logger.warning("Missing or invalid authorization header for %s", func.__name__)
                 raise AuthorizationError("Missing or invalid authorization header")
             
             token = auth_header[7:]  # Remove 'Bearer ' prefix
-            user_roles = auth_middleware.extract_app_roles(token)
+            user_roles = await auth_middleware.get_app_roles(token)
             
             # Check if user has any of the required roles
-            if not any(role in user_roles for role in required_roles):
-                logger.warning(f"Access denied to {func.__name__}. User roles: {user_roles}, Required: {required_roles}")
+            if required_role_set.isdisjoint(user_roles):
+                logger.warning("Access denied to %s. User roles: %s, Required: %s", func.__name__, user_roles, required_roles)
                 raise AuthorizationError(
                     f"Insufficient permissions. Required roles: {required_roles}",
                     required_roles
                 )
             
-            logger.info(f"Access granted to {func.__name__}. User roles: {user_roles}")
+            logger.debug("Access granted to %s. User roles: %s", func.__name__, user_roles)
             return await func(*args, **kwargs)
         return wrapper
     return decorator
 
 
-def get_user_accessible_tools(ctx: Context = None) -> List[str]:
+async def get_user_accessible_tools(ctx: Context = None) -> List[str]:
     """Get list of tools accessible to current user"""
     if not auth_middleware.enable_auth:
         return list(ROLE_PERMISSIONS["MCP.Admin"])
@@ -215,14 +397,18 @@ def get_user_accessible_tools(ctx: Context = None) -> List[str]:
         return []
     
     token = auth_header[7:]
-    user_roles = auth_middleware.extract_app_roles(token)
-    
+    user_roles = await auth_middleware.get_app_roles(token)
+    return list(_tools_for_roles(frozenset(user_roles)))
+
+
+@lru_cache(maxsize=64)
+def _tools_for_roles(roles: frozenset) -> frozenset:
+    """Union of the tools granted by a set of roles (ROLE_PERMISSIONS is static)"""
     accessible_tools = set()
-    for role in user_roles:
+    for role in roles:
         if role in ROLE_PERMISSIONS:
             accessible_tools.update(ROLE_PERMISSIONS[role])
-    
-    return list(accessible_tools)
+    return frozenset(accessible_tools)
 
 
 # Tool implementations with role-based authorization
@@ -242,12 +428,7 @@ async def add(a: float, b: float, ctx: Context) -> Dict[str, Any]:
         Dictionary containing the operation, operands, and result
     """
     result = a + b
-    return {
-        "operation": "addition",
-        "operands": [a, b],
-        "result": result,
-        "expression": f"{a} + {b} = {result}"
-    }
+    return _arithmetic_result("addition", "+", a, b, result)
 
 
 @mcp.tool()
@@ -265,12 +446,7 @@ async def subtract(a: float, b: float, ctx: Context) -> Dict[str, Any]:
         Dictionary containing the operation, operands, and result
     """
     result = a - b
-    return {
-        "operation": "subtraction",
-        "operands": [a, b],
-        "result": result,
-        "expression": f"{a} - {b} = {result}"
-    }
+    return _arithmetic_result("subtraction", "-", a, b, result)
 
 
 @mcp.tool()
@@ -288,12 +464,7 @@ async def multiply(a: float, b: float, ctx: Context) -> Dict[str, Any]:
         Dictionary containing the operation, operands, and result
     """
     result = a * b
-    return {
-        "operation": "multiplication",
-        "operands": [a, b],
-        "result": result,
-        "expression": f"{a} × {b} = {result}"
-    }
+    return _arithmetic_result("multiplication", "×", a, b, result)
 
 
 @mcp.tool()
@@ -317,12 +488,7 @@ async def divide(a: float, b: float, ctx: Context) -> Dict[str, Any]:
         raise ValueError("Cannot divide by zero")
     
     result = a / b
-    return {
-        "operation": "division",
-        "operands": [a, b],
-        "result": result,
-        "expression": f"{a} ÷ {b} = {result}"
-    }
+    return _arithmetic_result("division", "÷", a, b, result)
 
 
 @mcp.tool()
@@ -340,16 +506,19 @@ async def calculate_expression(expression: str, ctx: Context) -> Dict[str, Any]:
     
     Note:
         Only supports basic arithmetic operations (+, -, *, /) and parentheses.
-        Uses eval() for simplicity - NOT recommended for production use.
+        Expressions are evaluated from their syntax tree, never with eval(),
+        and results are cached. Expressions longer than 1000 characters are rejected.
     """
     try:
+        if len(expression) > MAX_EXPRESSION_LENGTH:
+            raise ValueError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+        
         # Sanitize the expression to only allow basic arithmetic
-        allowed_chars = set('0123456789+-*/.() ')
-        if not all(c in allowed_chars for c in expression):
+        if _INVALID_EXPRESSION_CHARS.search(expression):
             raise ValueError("Expression contains invalid characters")
         
-        # Evaluate the expression
-        result = eval(expression)
+        # Evaluate the expression by walking its syntax tree; ast.parse rejects leading spaces that eval() allowed
+        result = _evaluate_expression(expression.strip())
         
         return {
             "operation": "expression_evaluation",
@@ -372,8 +541,13 @@ async def get_calculator_info(ctx: Context) -> str:
     Returns:
         Information about available operations based on user permissions
     """
-    accessible_tools = get_user_accessible_tools(ctx)
-    
+    accessible_tools = await get_user_accessible_tools(ctx)
+    return _render_calculator_info(frozenset(accessible_tools))
+
+
+@lru_cache(maxsize=16)
+def _render_calculator_info(accessible_tools: frozenset) -> str:
+    """Render the calculator info text for one set of accessible tools"""
     base_info = """
 Calculator MCP Server Information (Role-Based Access)
 ===================================================
@@ -390,10 +564,7 @@ Your accessible operations:
         "calculate_expression": "- calculate_expression(expression): Evaluate a mathematical expression"
     }
     
-    available_ops = []
-    for tool in accessible_tools:
-        if tool in tool_descriptions:
-            available_ops.append(tool_descriptions[tool])
+    available_ops = [description for tool, description in tool_descriptions.items() if tool in accessible_tools]
     
     if not available_ops:
         available_ops.append("- No operations available (insufficient permissions)")
@@ -420,8 +591,13 @@ async def math_helper_prompt(ctx: Context) -> str:
     Returns:
         A prompt that guides users on how to use the calculator
     """
-    accessible_tools = get_user_accessible_tools(ctx)
-    
+    accessible_tools = await get_user_accessible_tools(ctx)
+    return _render_math_helper_prompt(frozenset(accessible_tools))
+
+
+@lru_cache(maxsize=16)
+def _render_math_helper_prompt(accessible_tools: frozenset) -> str:
+    """Render the math helper prompt for one set of accessible tools"""
     base_prompt = """
 I'm a calculator assistant with role-based access control.
 
@@ -436,10 +612,7 @@ Your available operations based on your permissions:
         "calculate_expression": "5. Expression evaluation: calculate_expression(\"expression\")"
     }
     
-    available_ops = []
-    for tool in accessible_tools:
-        if tool in tool_descriptions:
-            available_ops.append(tool_descriptions[tool])
+    available_ops = [description for tool, description in tool_descriptions.items() if tool in accessible_tools]
     
     if not available_ops:
         return base_prompt + "\nNo operations available. Please contact your administrator for access."
@@ -461,32 +634,42 @@ async def handle_authorization_error(error: AuthorizationError) -> Dict[str, Any
 
 if __name__ == "__main__":
     # Get configuration from environment variables
-    transport = os.getenv("MCP_TRANSPORT", "streamable-http")
+    config = load_app_config(default_transport="streamable-http")
     
     print(f"Starting Calculator MCP Server with Authentication...")
-    print(f"Transport: {transport}")
+    print(f"Transport: {config.transport}")
     print(f"Authentication: {'Enabled' if auth_middleware.enable_auth else 'Disabled (Demo Mode)'}")
     
     if auth_middleware.enable_auth:
+        # Warm the signing keys so the first requests skip the JWKS download
+        try:
+            auth_middleware.refresh_jwks()
+        except Exception:
+            print("Warning: could not prefetch JWKS; keys will be fetched on first use")
+        
         print(f"Azure Tenant ID: {auth_middleware.tenant_id}")
         print(f"Azure Client ID: {auth_middleware.client_id}")
         print("Role Permissions:")
         for role, tools in ROLE_PERMISSIONS.items():
             print(f"  {role}: {', '.join(tools)}")
     
-    if transport == "streamable-http":
-        host = os.getenv("MCP_HOST", "0.0.0.0")
-        port = int(os.getenv("MCP_PORT", "8000"))
-        
-        print(f"Server will listen on {host}:{port}")
+    if config.transport == "streamable-http":
+        print(f"Server will listen on {config.host}:{config.port}")
         print("Endpoints available:")
-        print(f"  - Health check: http://{host}:{port}/health")
-        print(f"  - MCP endpoint: http://{host}:{port}/mcp")
+        print(f"  - Health check: http://{config.host}:{config.port}/health")
+        print(f"  - MCP endpoint: http://{config.host}:{config.port}/mcp")
         print("\nNote: For full OAuth 2.1 compliance (RFC 9728), consider implementing")
         print("the /.well-known/oauth-protected-resource endpoint in production.")
         
-        # Run with streamable HTTP transport
-        mcp.run(transport="streamable-http")
+        # Run the streamable HTTP app on uvloop with the httptools parser
+        uvicorn.run(
+            mcp.streamable_http_app(),
+            host=config.host,
+            port=config.port,
+            log_level=mcp.settings.log_level.lower(),
+            loop="uvloop",
+            http="httptools"
+        )
     else:
         print("Only streamable-http transport is supported in this version")
         exit(1)